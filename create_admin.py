@@ -14,7 +14,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecocommute.settings')
 django.setup()
 
 from django.contrib.auth.models import User
-from rides.models import UserProfile
+from rides.models import UserProfile, PHONE_NUMBER_RE, phone_digits
 
 
 def create_admin_user():
@@ -62,9 +62,8 @@ def create_new_admin():
     phone = input("Phone number (91XXXXXXXXXX format): ").strip()
     
     # Validate phone number
-    import re
-    cleaned_phone = ''.join(filter(str.isdigit, phone))
-    if not re.match(r'^91\d{10}$', cleaned_phone):
+    cleaned_phone = phone_digits(phone)
+    if not PHONE_NUMBER_RE.match(cleaned_phone):
         print("Error: Phone number must start with 91 and be exactly 12 digits.")
         print("Example: 919876543210")
         sys.exit(1)
@@ -78,12 +77,12 @@ def create_new_admin():
         )
         user.is_staff = True
         user.is_active = True
-        user.save()
+        user.save(update_fields=['is_staff', 'is_active'])
         
         # Update profile with phone number
         profile = user.profile
         profile.phone_number = cleaned_phone
-        profile.save()
+        profile.save(update_fields=['phone_number'])
         
         print("\n✅ Success! Admin user created successfully.")
         print(f"   Email: {email}")
@@ -100,31 +99,33 @@ def promote_existing_user():
     """Promote an existing user to staff status."""
     print("\n--- Promote Existing User ---\n")
     
-    # List all users
-    users = User.objects.all().order_by('email')
+    # List all users (plain tuples - no need to build a User object per row)
+    rows = list(
+        User.objects.order_by('email').values_list('id', 'email', 'is_staff', 'is_active')
+    )
     
-    if not users.exists():
+    if not rows:
         print("No users found in the database.")
         print("Please create a user first by registering on the website.")
         sys.exit(1)
     
     print("Existing users:")
     print("-" * 60)
-    for idx, user in enumerate(users, 1):
-        staff_status = "✓ Staff" if user.is_staff else "✗ Not Staff"
-        active_status = "Active" if user.is_active else "Inactive"
-        print(f"{idx}. {user.email:30} | {staff_status:12} | {active_status}")
+    for idx, (_, email, is_staff, is_active) in enumerate(rows, 1):
+        staff_status = "✓ Staff" if is_staff else "✗ Not Staff"
+        active_status = "Active" if is_active else "Inactive"
+        print(f"{idx}. {email:30} | {staff_status:12} | {active_status}")
     print("-" * 60)
     print()
     
     # Get user choice
     try:
         choice = int(input("Enter the number of the user to promote: ").strip())
-        if choice < 1 or choice > users.count():
+        if choice < 1 or choice > len(rows):
             print("Error: Invalid choice.")
             sys.exit(1)
         
-        user = list(users)[choice - 1]
+        user = User.objects.get(pk=rows[choice - 1][0])
         
         # Check if already staff
         if user.is_staff:
@@ -137,7 +138,7 @@ def promote_existing_user():
         # Promote to staff
         user.is_staff = True
         user.is_active = True
-        user.save()
+        user.save(update_fields=['is_staff', 'is_active'])
         
         print("\n✅ Success! User promoted to staff.")
         print(f"   Email: {user.email}")
@@ -100,6 +100,40 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+# Per-process memory cache for development. Point this at Redis or Memcached
+# in production so cached values are shared between workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ecocommute',
+    }
+}
+
+
+# Sessions
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/#using-cached-sessions
+# Write-through cache: session reads are served from the cache and only fall
+# back to the database on a miss, saving a query on every logged-in request.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/6.0/topics/auth/passwords/#using-argon2-with-django
+# Argon2 is used for new hashes. Existing PBKDF2 hashes still verify and are
+# upgraded to Argon2 automatically on the user's next successful login.
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -137,6 +171,18 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 # DEFAULT_FROM_EMAIL = EMAIL_HOST_USER or 'noreply@ecocommute.com'
 
+# Background Tasks
+# Notification emails are enqueued on the 'email' queue (see rides/tasks.py).
+# The immediate backend runs them in-process for development; in production
+# point BACKEND at a worker-backed task backend so SMTP latency stays out of
+# the request/response cycle.
+TASKS = {
+    'default': {
+        'BACKEND': 'django.tasks.backends.immediate.ImmediateBackend',
+        'QUEUES': ['default', 'email'],
+    }
+}
+
 
 # ============================================================================
 # AADHAAR VERIFICATION SETTINGS
@@ -23,15 +23,36 @@ LEGAL COMPLIANCE:
 - Never stores or logs full Aadhaar numbers
 """
 
+import json
+from functools import lru_cache
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
 from typing import Dict, Tuple, Optional
-import hashlib
+import secrets
 import time
 
 logger = logging.getLogger(__name__)
 
+# Separators users commonly type inside an Aadhaar number (1234 5678 9012)
+_AADHAAR_SEPARATORS = str.maketrans('', '', ' -')
+
+# (connect, read) timeouts in seconds for provider API calls
+API_TIMEOUT = (3, 30)
+
+# Shared HTTP session so OTP send/verify calls reuse pooled keep-alive
+# connections instead of paying a TCP + TLS handshake on every request.
+# Retries cover connection failures and gateway errors; POST requests are
+# not retried on error responses, so an OTP is never sent twice.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+))
+
 
 class AadhaarAPIException(Exception):
     """Custom exception for Aadhaar API errors"""
@@ -118,14 +139,15 @@ class AadhaarVerificationService:
             Tuple of (is_valid, error_message)
         """
         # Remove spaces and hyphens
-        clean_aadhaar = aadhaar_number.replace(' ', '').replace('-', '')
+        clean_aadhaar = aadhaar_number.translate(_AADHAAR_SEPARATORS)
         
         # Check if 12 digits
         if len(clean_aadhaar) != 12:
             return False, "Aadhaar number must be 12 digits"
         
-        # Check if all digits
-        if not clean_aadhaar.isdigit():
+        # Check if all digits. isascii() keeps out non-ASCII digits such as
+        # Devanagari numerals, which isdigit() alone would accept.
+        if not (clean_aadhaar.isascii() and clean_aadhaar.isdigit()):
             return False, "Aadhaar number must contain only digits"
         
         # Basic Verhoeff algorithm check (optional - Aadhaar uses this)
@@ -140,8 +162,7 @@ class AadhaarVerificationService:
         Returns:
             Unique request ID
         """
-        timestamp = str(time.time())
-        return hashlib.sha256(timestamp.encode()).hexdigest()[:16]
+        return secrets.token_hex(8)
     
     def _make_api_request(self, endpoint: str, payload: Dict, method: str = 'POST') -> Dict:
         """
@@ -166,22 +187,22 @@ class AadhaarVerificationService:
         
         try:
             if method == 'POST':
-                response = requests.post(
+                response = _SESSION.post(
                     endpoint,
-                    json=payload,
+                    data=json.dumps(payload, separators=(',', ':')),
                     headers=headers,
-                    timeout=30  # 30 second timeout
+                    timeout=API_TIMEOUT
                 )
             else:
-                response = requests.get(
+                response = _SESSION.get(
                     endpoint,
                     params=payload,
                     headers=headers,
-                    timeout=30
+                    timeout=API_TIMEOUT
                 )
             
             response.raise_for_status()
-            return response.json()
+            return json.loads(response.content)
             
         except requests.exceptions.Timeout:
             logger.error(f"API request timeout for {endpoint}")
@@ -218,14 +239,12 @@ class AadhaarVerificationService:
             (True, "OTP sent successfully", "TXN123456789")
             (False, "Invalid Aadhaar number", None)
         """
-        # Validate Aadhaar format
-        is_valid, error_msg = self._validate_aadhaar_number(aadhaar_number)
+        # Clean Aadhaar number once and validate the cleaned value
+        clean_aadhaar = aadhaar_number.translate(_AADHAAR_SEPARATORS)
+        is_valid, error_msg = self._validate_aadhaar_number(clean_aadhaar)
         if not is_valid:
             return False, error_msg, None
         
-        # Clean Aadhaar number
-        clean_aadhaar = aadhaar_number.replace(' ', '').replace('-', '')
-        
         # Generate request ID for tracking
         request_id = self._generate_request_id()
         
@@ -360,7 +379,7 @@ class AadhaarVerificationService:
         Returns:
             Last 4 digits as string
         """
-        clean_aadhaar = aadhaar_number.replace(' ', '').replace('-', '')
+        clean_aadhaar = aadhaar_number.translate(_AADHAAR_SEPARATORS)
         return clean_aadhaar[-4:] if len(clean_aadhaar) == 12 else ""
 
 
@@ -427,6 +446,14 @@ class MockAadhaarService(AadhaarVerificationService):
 # FACTORY FUNCTION
 # ============================================================================
 
+@lru_cache(maxsize=2)
+def _build_aadhaar_service(use_mock: bool, provider: str) -> AadhaarVerificationService:
+    """Build a service once per (mock, provider) pair; instances hold only config."""
+    if use_mock:
+        return MockAadhaarService()
+    return AadhaarVerificationService(provider)
+
+
 def get_aadhaar_service() -> AadhaarVerificationService:
     """
     Factory function to get appropriate Aadhaar service instance.
@@ -434,10 +461,7 @@ def get_aadhaar_service() -> AadhaarVerificationService:
     Returns:
         AadhaarVerificationService instance (real or mock)
     """
-    use_mock = getattr(settings, 'AADHAAR_USE_MOCK', True)
-    
-    if use_mock:
-        return MockAadhaarService()
-    else:
-        provider = getattr(settings, 'AADHAAR_API_PROVIDER', 'cashfree')
-        return AadhaarVerificationService(provider)
+    return _build_aadhaar_service(
+        getattr(settings, 'AADHAAR_USE_MOCK', True),
+        getattr(settings, 'AADHAAR_API_PROVIDER', 'cashfree'),
+    )
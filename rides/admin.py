@@ -4,7 +4,9 @@ from .models import Ride, RidePassenger, UserProfile, LiveLocation
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
-    list_display = ['user', 'phone_number', 'aadhaar_verified', 'aadhaar_masked', 'created_at']
+    list_display = ['user', 'phone_number', 'aadhaar_verified', 'aadhaar_masked', 'aadhaar_failed_attempts', 'created_at']
+    list_select_related = ['user']
+    show_full_result_count = False
     search_fields = ['user__email', 'phone_number', 'aadhaar_last_4_digits']
     list_filter = ['aadhaar_verified', 'aadhaar_consent_given', 'created_at']
     readonly_fields = ['aadhaar_verified_at', 'aadhaar_consent_timestamp', 'created_at']
@@ -18,8 +20,10 @@ class UserProfileAdmin(admin.ModelAdmin):
                 'aadhaar_verified',
                 'aadhaar_last_4_digits',
                 'aadhaar_verified_at',
+                'aadhaar_failed_attempts',
             ),
-            'description': 'Aadhaar verification status. Full Aadhaar number is NEVER stored.'
+            'description': 'Aadhaar verification status. Full Aadhaar number is NEVER stored. '
+                           'Set failed attempts back to 0 to unlock a user.'
         }),
         ('Consent & Compliance', {
             'fields': (
@@ -38,7 +42,9 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 @admin.register(Ride)
 class RideAdmin(admin.ModelAdmin):
-    list_display = ['from_location', 'to_location', 'ride_date', 'ride_time', 'creator', 'ride_status', 'seats_available', 'total_seats']
+    list_display = ['from_location', 'to_location', 'ride_date', 'ride_time', 'creator', 'ride_status', 'seats_available', 'total_seats', 'occupant_count']
+    list_select_related = ['creator']
+    show_full_result_count = False
     list_filter = ['ride_date', 'vehicle_type', 'ride_status', 'driver_started', 'passenger_started', 'driver_ended', 'passenger_ended']
     search_fields = ['from_location', 'to_location', 'creator__email']
     readonly_fields = ['created_at']
@@ -63,11 +69,20 @@ class RideAdmin(admin.ModelAdmin):
             'description': 'Both must confirm for ride to complete'
         }),
     )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_occupancy()
+    
+    @admin.display(description='Occupants', ordering='_occupant_count')
+    def occupant_count(self, obj):
+        return obj.occupant_count
 
 
 @admin.register(RidePassenger)
 class RidePassengerAdmin(admin.ModelAdmin):
     list_display = ['user', 'ride', 'joined_at']
+    list_select_related = ['user', 'ride']
+    show_full_result_count = False
     list_filter = ['joined_at']
     search_fields = ['user__email', 'ride__from_location', 'ride__to_location']
 
@@ -75,6 +90,8 @@ class RidePassengerAdmin(admin.ModelAdmin):
 @admin.register(LiveLocation)
 class LiveLocationAdmin(admin.ModelAdmin):
     list_display = ['user', 'ride', 'latitude', 'longitude', 'is_sharing', 'updated_at']
+    list_select_related = ['user', 'ride']
+    show_full_result_count = False
     list_filter = ['is_sharing', 'updated_at']
     search_fields = ['user__email', 'ride__from_location', 'ride__to_location']
     readonly_fields = ['updated_at']
@@ -10,41 +10,43 @@ from django.contrib.auth.models import User
 from rides.models import UserProfile
 
 
+# Profiles inserted per bulk_create call
+BATCH_SIZE = 1000
+
+
 class Command(BaseCommand):
     help = 'Create UserProfile for all users who do not have one'
 
     def handle(self, *args, **options):
-        users_without_profile = []
+        # Single anti-join over the reverse OneToOne, streamed from the
+        # cursor so memory stays bounded by the batch size; a profile created
+        # concurrently (e.g. by the post_save signal) is skipped rather than
+        # failing the whole batch
+        missing_user_ids = (
+            User.objects.filter(profile__isnull=True)
+            .values_list('id', flat=True)
+            .iterator(chunk_size=2000)
+        )
         
-        for user in User.objects.all():
-            if not hasattr(user, 'profile'):
-                users_without_profile.append(user)
+        # ignore_conflicts hides which rows were skipped, so the number
+        # actually created is read from the table afterwards
+        profiles_before = UserProfile.objects.count()
+        batch = []
+        for user_id in missing_user_ids:
+            batch.append(UserProfile(user_id=user_id))
+            if len(batch) >= BATCH_SIZE:
+                UserProfile.objects.bulk_create(batch, ignore_conflicts=True)
+                batch.clear()
+        if batch:
+            UserProfile.objects.bulk_create(batch, ignore_conflicts=True)
+        created_count = UserProfile.objects.count() - profiles_before
         
-        if not users_without_profile:
+        if not created_count:
             self.stdout.write(
                 self.style.SUCCESS('✅ All users already have profiles!')
             )
             return
         
-        self.stdout.write(
-            self.style.WARNING(
-                f'Found {len(users_without_profile)} users without profiles'
-            )
-        )
-        
-        created_count = 0
-        for user in users_without_profile:
-            try:
-                UserProfile.objects.create(user=user)
-                created_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'✅ Created profile for: {user.email}')
-                )
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'❌ Failed to create profile for {user.email}: {e}')
-                )
-        
         self.stdout.write(
             self.style.SUCCESS(
                 f'\n✅ Successfully created {created_count} profiles!'
@@ -3,28 +3,76 @@ Management command to delete a user by email for testing purposes.
 
 Usage:
     python manage.py delete_user email@example.com
+    python manage.py delete_user --emails emails.txt
 """
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from django.db.models import Q
+
+# Addresses per username IN (...) query
+CHUNK_SIZE = 500
 
 
 class Command(BaseCommand):
     help = 'Delete a user by email (for testing purposes)'
 
     def add_arguments(self, parser):
-        parser.add_argument('email', type=str, help='Email of the user to delete')
+        parser.add_argument('email', type=str, nargs='?', help='Email of the user to delete')
+        parser.add_argument('--emails', type=str, help='File with one email per line to delete in one go')
 
     def handle(self, *args, **options):
-        email = options['email'].strip().lower()
+        if options['emails']:
+            with open(options['emails']) as f:
+                emails = {line.strip().lower() for line in f if line.strip()}
+        elif options['email']:
+            emails = {options['email'].strip().lower()}
+        else:
+            raise CommandError('Pass an email or --emails <file>')
+        
+        if not emails:
+            raise CommandError('No emails given')
+        
+        # Usernames are the unique, indexed column; match them with plain
+        # IN lookups in fixed-size chunks so the query stays small
+        emails = sorted(emails)
+        deleted = 0
+        unmatched = []
+        for i in range(0, len(emails), CHUNK_SIZE):
+            chunk = emails[i:i + CHUNK_SIZE]
+            users = User.objects.filter(username__in=chunk)
+            found = set(users.values_list('username', flat=True))
+            unmatched.extend(email for email in chunk if email not in found)
+            deleted += self._delete(users)
+        
+        # Fall back to a case-insensitive lookup for the rest. email is not
+        # unique, so an address matching several users is left alone.
+        missing = []
+        ambiguous = []
+        for email in unmatched:
+            users = User.objects.filter(Q(username__iexact=email) | Q(email__iexact=email))
+            ids = list(users.values_list('id', flat=True)[:2])
+            if not ids:
+                missing.append(email)
+            elif len(ids) > 1:
+                ambiguous.append(email)
+            else:
+                deleted += self._delete(User.objects.filter(id=ids[0]))
         
-        try:
-            user = User.objects.get(username=email)
-            user_email = user.email
-            user.delete()
+        if deleted:
             self.stdout.write(
-                self.style.SUCCESS(f'✅ Successfully deleted user: {user_email}')
+                self.style.SUCCESS(f'✅ Successfully deleted {deleted} user(s)')
             )
-        except User.DoesNotExist:
+        if ambiguous:
             self.stdout.write(
-                self.style.ERROR(f'❌ User with email "{email}" not found')
+                self.style.WARNING(f'⚠️ Several users match, nothing deleted for: {", ".join(ambiguous)}')
             )
+        if missing:
+            self.stdout.write(
+                self.style.ERROR(f'❌ No user found for: {", ".join(missing)}')
+            )
+
+    def _delete(self, users):
+        # Queryset delete: one DELETE per table (cascades included) instead
+        # of loading and deleting each user separately
+        _, deleted_per_model = users.delete()
+        return deleted_per_model.get(User._meta.label, 0)
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
 from datetime import datetime, timedelta
-from rides.models import Ride
+from rides.models import Ride, UserProfile
 
 
 class Command(BaseCommand):
@@ -12,10 +13,16 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('Database already has data; skipping seed.'))
             return
 
-        # Create users
-        alice = User.objects.create_user(username='alice@eco.com', email='alice@eco.com', password='password')
-        bob = User.objects.create_user(username='bob@eco.com', email='bob@eco.com', password='password')
-        carol = User.objects.create_user(username='carol@eco.com', email='carol@eco.com', password='password')
+        # Create users. Every seed user shares one password, so hash it once
+        # and insert the users in a single batch.
+        password = make_password('password')
+        alice, bob, carol = User.objects.bulk_create([
+            User(username=email, email=email, password=password)
+            for email in ('alice@eco.com', 'bob@eco.com', 'carol@eco.com')
+        ])
+
+        # bulk_create does not send post_save, so create the profiles here
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in (alice, bob, carol)])
 
         self.stdout.write(self.style.SUCCESS(f'Created users: {alice.email}, {bob.email}, {carol.email}'))
 
@@ -23,29 +30,30 @@ class Command(BaseCommand):
         tomorrow = datetime.now().date() + timedelta(days=1)
         in_two_days = datetime.now().date() + timedelta(days=2)
 
-        ride1 = Ride.objects.create(
-            from_location='Campus',
-            to_location='Downtown',
-            ride_date=tomorrow,
-            ride_time=datetime.strptime('08:30', '%H:%M').time(),
-            vehicle_type='car_petrol',
-            distance_km=12,
-            total_seats=4,
-            seats_available=2,
-            creator=alice
-        )
-
-        ride2 = Ride.objects.create(
-            from_location='Station',
-            to_location='Office Park',
-            ride_date=in_two_days,
-            ride_time=datetime.strptime('09:00', '%H:%M').time(),
-            vehicle_type='car_petrol',
-            distance_km=20,
-            total_seats=3,
-            seats_available=1,
-            creator=bob
-        )
+        ride1, ride2 = Ride.objects.bulk_create([
+            Ride(
+                from_location='Campus',
+                to_location='Downtown',
+                ride_date=tomorrow,
+                ride_time=datetime.strptime('08:30', '%H:%M').time(),
+                vehicle_type='car_petrol',
+                distance_km=12,
+                total_seats=4,
+                seats_available=2,
+                creator=alice
+            ),
+            Ride(
+                from_location='Station',
+                to_location='Office Park',
+                ride_date=in_two_days,
+                ride_time=datetime.strptime('09:00', '%H:%M').time(),
+                vehicle_type='car_petrol',
+                distance_km=20,
+                total_seats=3,
+                seats_available=1,
+                creator=bob
+            ),
+        ], batch_size=500)
 
         self.stdout.write(self.style.SUCCESS(f'Created rides: {ride1}, {ride2}'))
         self.stdout.write(self.style.SUCCESS('Database seeded successfully!'))
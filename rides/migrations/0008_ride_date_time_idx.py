@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-15 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0007_ride_vehicle_number_alter_userprofile_phone_number'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['ride_date', 'ride_time'], name='ride_date_time_idx'),
+        ),
+    ]
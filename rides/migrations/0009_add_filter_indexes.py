@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-15 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0008_ride_date_time_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livelocation',
+            index=models.Index(fields=['ride', 'is_sharing', 'updated_at'], name='liveloc_ride_sharing_upd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['ride_status', '-created_at'], name='ride_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ride',
+            index=models.Index(fields=['creator', 'ride_status'], name='ride_creator_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ridepassenger',
+            index=models.Index(fields=['ride', 'joined_at'], name='passenger_ride_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['aadhaar_verified'], name='profile_aadhaar_verified_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-15 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0009_add_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='ridepassenger',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='ridepassenger',
+            constraint=models.UniqueConstraint(fields=('user', 'ride'), name='unique_ride_passenger'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-15 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0010_ridepassenger_unique_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='aadhaar_failed_attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Wrong OTP submissions since the last successful verification'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-15 07:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0011_userprofile_aadhaar_failed_attempts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ride',
+            name='ride_status',
+            field=models.CharField(choices=[('created', 'Created'), ('started', 'Started'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='created', max_length=20),
+        ),
+    ]
@@ -1,14 +1,46 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from datetime import datetime
+from enum import IntEnum
+from types import MappingProxyType
+import re
 
 
-EMISSION_FACTORS = {
+# Stored phone numbers are bare digits: 91 followed by 10 digits
+PHONE_NUMBER_RE = re.compile(r'^91\d{10}$')
+# Translation table that deletes every non-digit Latin-1 character; the
+# common case (spaces, dashes, +, brackets) is handled in a single pass
+_DIGITS_ONLY = str.maketrans('', '', ''.join(c for c in map(chr, range(256)) if not c.isdigit()))
+
+
+def phone_digits(value):
+    """Return just the digits of a phone number as typed (e.g. '+91 98765-43210')."""
+    digits = value.translate(_DIGITS_ONLY)
+    if not (digits.isascii() and digits.isdigit()):
+        # Separators outside Latin-1 (narrow no-break space, en dash,
+        # zero-width space, ...) survive the table; drop them one by one
+        digits = ''.join(filter(str.isdigit, digits))
+    return digits
+
+
+# Read-only: these tables are shared by every request
+EMISSION_FACTORS = MappingProxyType({
     "car_petrol": 120,  # g CO2 per km
     "bike": 0,
-}
+})
+
+# Index-based view of EMISSION_FACTORS for hot paths: VehicleType numbers
+# the vehicle types (CAR_PETROL=0, BIKE=1), VEHICLE_IDS maps the stored
+# string to its member, and EMISSION_FACTOR_TABLE holds kg CO2 per km in
+# the same order.
+VehicleType = IntEnum('VehicleType', [vehicle_type.upper() for vehicle_type in EMISSION_FACTORS], start=0)
+VEHICLE_IDS = MappingProxyType({vehicle_type: VehicleType[vehicle_type.upper()] for vehicle_type in EMISSION_FACTORS})
+EMISSION_FACTOR_TABLE = tuple(factor * 0.001 for factor in EMISSION_FACTORS.values())
 
 
 class UserProfile(models.Model):
@@ -60,9 +92,19 @@ class UserProfile(models.Model):
         blank=True,
         help_text="When Aadhaar was successfully verified"
     )
+    aadhaar_failed_attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Wrong OTP submissions since the last successful verification"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Verified/unverified filters in the admin
+            models.Index(fields=['aadhaar_verified'], name='profile_aadhaar_verified_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.email} - Profile"
     
@@ -79,15 +121,12 @@ class UserProfile(models.Model):
     
     def clean(self):
         """Validate phone number format"""
-        import re
-        from django.core.exceptions import ValidationError
-        
         if self.phone_number:
             # Remove any non-digit characters
-            cleaned = ''.join(filter(str.isdigit, self.phone_number))
+            cleaned = phone_digits(self.phone_number)
             
             # Validate format: must start with 91 and be exactly 12 digits
-            if not re.match(r'^91\d{10}$', cleaned):
+            if not PHONE_NUMBER_RE.match(cleaned):
                 raise ValidationError({
                     'phone_number': 'Phone number must start with 91 and contain exactly 12 digits (e.g., 919876543210)'
                 })
@@ -95,37 +134,70 @@ class UserProfile(models.Model):
             # Store the cleaned version
             self.phone_number = cleaned
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded phone number so save() can spot changes without a query"""
+        instance = super().from_db(db, field_names, values)
+        # A deferred phone_number is left unset; save() then validates
+        instance._orig_phone_number = instance.__dict__.get('phone_number')
+        return instance
+    
     def save(self, *args, **kwargs):
         """Override save to call clean before saving"""
-        # Only validate if phone number is being changed (not on every save)
-        if self.pk:  # If this is an update (not a new record)
-            try:
-                old_instance = UserProfile.objects.get(pk=self.pk)
-                # Only validate if phone number has changed
-                if old_instance.phone_number != self.phone_number:
-                    self.clean()
-            except UserProfile.DoesNotExist:
-                self.clean()
-        else:  # New record
+        # Only validate new records or when the phone number has changed
+        # since the row was loaded (not on every save)
+        if self.pk is None:
             self.clean()
+        else:
+            old_phone_number = getattr(self, '_orig_phone_number', None)
+            if old_phone_number is None:
+                # No snapshot (not loaded via from_db, or the field was
+                # deferred): read just the stored number
+                old_phone_number = UserProfile.objects.filter(pk=self.pk).values_list('phone_number', flat=True).first()
+            if old_phone_number != self.phone_number:
+                self.clean()
         super().save(*args, **kwargs)
+        self._orig_phone_number = self.phone_number
 
 
-@receiver(post_save, sender=User)
+@receiver(post_save, sender=User, dispatch_uid='rides.create_user_profile')
 def create_user_profile(sender, instance, created, **kwargs):
     """Automatically create UserProfile when User is created"""
-    if created:
+    # Users that predate this signal get their profile on the next save
+    # (e.g. the last_login update at login); create_missing_profiles
+    # backfills the rest in bulk
+    if created or not hasattr(instance, 'profile'):
         UserProfile.objects.create(user=instance)
 
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save UserProfile when User is saved"""
-    # Use get_or_create to handle cases where profile doesn't exist
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
-    else:
-        UserProfile.objects.create(user=instance)
+class RideQuerySet(models.QuerySet):
+    def active(self):
+        """Rides users can still see and act on (admins keep cancelled ones on record)."""
+        return self.exclude(ride_status='cancelled')
+    
+    def with_occupancy(self):
+        """Annotate occupant_count in SQL so lists can sort/filter on it without per-row work."""
+        return self.annotate(
+            _occupant_count=Greatest(F('total_seats') - F('seats_available'), 1)
+        )
+    
+    def confirm(self, ride_id, flag, from_status, **conditions):
+        """
+        Set a confirmation flag in one conditional UPDATE. Returns False when
+        the ride is missing, not in from_status, already confirmed, or does
+        not match the extra conditions (e.g. creator=user).
+        """
+        return bool(
+            self.filter(pk=ride_id, ride_status=from_status, **{flag: False}, **conditions)
+            .update(**{flag: True})
+        )
+    
+    def advance_status(self, ride_id, from_status, to_status, *flags):
+        """Move a ride to to_status only if it is in from_status and every flag is set."""
+        return bool(
+            self.filter(pk=ride_id, ride_status=from_status, **{flag: True for flag in flags})
+            .update(ride_status=to_status)
+        )
 
 
 class Ride(models.Model):
@@ -138,6 +210,7 @@ class Ride(models.Model):
         ('created', 'Created'),
         ('started', 'Started'),
         ('completed', 'Completed'),
+        ('cancelled', 'Cancelled'),
     ]
     
     from_location = models.CharField(max_length=120)
@@ -167,39 +240,43 @@ class Ride(models.Model):
         default='created'
     )
 
+    objects = RideQuerySet.as_manager()
+
     class Meta:
         ordering = ['ride_date', 'ride_time']
+        indexes = [
+            # Matches the default ordering used by every ride listing
+            models.Index(fields=['ride_date', 'ride_time'], name='ride_date_time_idx'),
+            # Status filters on the admin dashboard and trip monitors; the
+            # admin lists also order each status newest first
+            models.Index(fields=['ride_status', '-created_at'], name='ride_status_created_idx'),
+            models.Index(fields=['creator', 'ride_status'], name='ride_creator_status_idx'),
+        ]
 
     def __str__(self):
         return f"{self.from_location} to {self.to_location} on {self.ride_date}"
 
     def save(self, *args, **kwargs):
-        """Override save to convert vehicle_number to uppercase"""
-        if self.vehicle_number:
+        """
+        Override save to convert vehicle_number to uppercase.
+        
+        Callers that change only a few columns should pass update_fields so
+        the UPDATE does not rewrite the whole row; vehicle_number is then
+        only normalized when it is one of those fields.
+        """
+        update_fields = kwargs.get('update_fields')
+        if self.vehicle_number and (update_fields is None or 'vehicle_number' in update_fields):
             self.vehicle_number = self.vehicle_number.upper()
         super().save(*args, **kwargs)
     
     @property
     def occupant_count(self):
         """Driver counts as one occupant; each filled seat removes one available slot."""
+        # Rides fetched through with_occupancy() already carry the figure
+        if '_occupant_count' in self.__dict__:
+            return self._occupant_count
         used_seats = self.total_seats - self.seats_available
         return max(used_seats, 1)
-    
-    def check_and_update_status(self):
-        """Check confirmations and update ride status automatically."""
-        # Check if ride should be started
-        if self.driver_started and self.passenger_started and self.ride_status == 'created':
-            self.ride_status = 'started'
-            self.save()
-            return 'started'
-        
-        # Check if ride should be completed
-        if self.driver_ended and self.passenger_ended and self.ride_status == 'started':
-            self.ride_status = 'completed'
-            self.save()
-            return 'completed'
-        
-        return None
 
 
 class RidePassenger(models.Model):
@@ -210,8 +287,17 @@ class RidePassenger(models.Model):
     joined_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ['user', 'ride']
         verbose_name_plural = 'Ride Passengers'
+        constraints = [
+            # One row per (user, ride); its index also serves every
+            # "has this user joined this ride" lookup, and join_ride relies
+            # on it to reject duplicate joins
+            models.UniqueConstraint(fields=['user', 'ride'], name='unique_ride_passenger'),
+        ]
+        indexes = [
+            # Passengers of a ride in the order they joined
+            models.Index(fields=['ride', 'joined_at'], name='passenger_ride_joined_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} joined {self.ride}"
@@ -233,6 +319,10 @@ class LiveLocation(models.Model):
     class Meta:
         verbose_name = 'Live Location'
         verbose_name_plural = 'Live Locations'
+        indexes = [
+            # Who is currently sharing on a given ride, freshest first
+            models.Index(fields=['ride', 'is_sharing', 'updated_at'], name='liveloc_ride_sharing_upd_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} - {self.ride} (Last update: {self.updated_at})"
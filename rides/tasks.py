@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+from django.tasks import task
+from .models import Ride
+
+
+@task(queue_name='email')
+def send_join_notification(ride_id, passenger_user_id, pickup_point, pickup_notes):
+    """Email the ride creator that a passenger has joined their ride."""
+    ride = Ride.objects.select_related('creator').filter(pk=ride_id).first()
+    passenger = User.objects.filter(pk=passenger_user_id).first()
+    if ride is None or passenger is None:
+        # Ride was deleted or the passenger left before the task ran
+        return
+    
+    email_subject = f"New Passenger Joined Your Ride - {ride.from_location} to {ride.to_location}"
+    
+    email_message = f"""Hello {ride.creator.email},
+
+Great news! A passenger has joined your ride.
+
+🚗 Ride Details:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Route: {ride.from_location} → {ride.to_location}
+Date: {ride.ride_date}
+Time: {ride.ride_time.strftime('%H:%M')}
+
+👤 Passenger Information:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Name/Email: {passenger.email}
+Pickup Point: {pickup_point}
+{f'Notes: {pickup_notes}' if pickup_notes else ''}
+
+📊 Current Status:
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Seats Available: {ride.seats_available}/{ride.total_seats}
+
+Please check your dashboard for complete details:
+http://127.0.0.1:8000/dashboard/
+
+Thank you for choosing EcoCommute!
+🌱 Together, we're making commuting more sustainable.
+
+---
+EcoCommute Team
+"""
+    
+    send_mail(
+        subject=email_subject,
+        message=email_message,
+        from_email=None,  # Uses DEFAULT_FROM_EMAIL from settings
+        recipient_list=[ride.creator.email],
+        fail_silently=True  # Don't fail the task if email fails
+    )
@@ -1,3 +1,175 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Ride, RidePassenger
+
+
+def make_user(email, verified=True, **extra):
+    """Create a user whose profile has passed Aadhaar verification."""
+    user = User.objects.create_user(username=email, email=email, password='pw', **extra)
+    profile = user.profile
+    profile.phone_number = '919876543210'
+    profile.aadhaar_verified = verified
+    profile.save()
+    return user
+
+
+def make_ride(creator, seats=2, **extra):
+    return Ride.objects.create(
+        from_location='Kochi',
+        to_location='Aluva',
+        ride_date=datetime.date.today() + datetime.timedelta(days=1),
+        ride_time=datetime.time(8, 30),
+        distance_km=12,
+        total_seats=seats,
+        seats_available=seats,
+        creator=creator,
+        **extra,
+    )
+
+
+class RideTestCase(TestCase):
+    def setUp(self):
+        # Throttle and dashboard entries must not leak between tests
+        cache.clear()
+        self.driver = make_user('driver@eco.com')
+        self.passenger = make_user('passenger@eco.com')
+        self.ride = make_ride(self.driver)
+        self.client.force_login(self.passenger)
+
+    def join(self):
+        return self.client.post(
+            reverse('join_ride', args=[self.ride.id]),
+            {'pickup_point': 'Main gate', 'pickup_notes': ''},
+        )
+
+    def seats_available(self):
+        self.ride.refresh_from_db()
+        return self.ride.seats_available
+
+
+class SeatAccountingTests(RideTestCase):
+    def test_join_takes_one_seat(self):
+        self.join()
+        self.assertEqual(self.seats_available(), 1)
+        self.assertTrue(RidePassenger.objects.filter(ride=self.ride, user=self.passenger).exists())
+
+    def test_joining_twice_takes_one_seat(self):
+        self.join()
+        self.join()
+        self.assertEqual(self.seats_available(), 1)
+        self.assertEqual(RidePassenger.objects.filter(ride=self.ride).count(), 1)
+
+    def test_leave_and_rejoin(self):
+        self.join()
+        self.client.post(reverse('leave_ride', args=[self.ride.id]))
+        self.assertEqual(self.seats_available(), 2)
+        self.assertFalse(RidePassenger.objects.filter(ride=self.ride).exists())
+
+        self.join()
+        self.assertEqual(self.seats_available(), 1)
+
+    def test_leaving_twice_frees_one_seat(self):
+        self.join()
+        self.client.post(reverse('leave_ride', args=[self.ride.id]))
+        self.client.post(reverse('leave_ride', args=[self.ride.id]))
+        self.assertEqual(self.seats_available(), 2)
+
+    def test_full_ride_cannot_be_joined(self):
+        Ride.objects.filter(pk=self.ride.pk).update(seats_available=0)
+        self.join()
+        self.assertEqual(self.seats_available(), 0)
+        self.assertFalse(RidePassenger.objects.filter(ride=self.ride).exists())
+
+
+class CancelledRideTests(RideTestCase):
+    def setUp(self):
+        super().setUp()
+        self.join()
+        Ride.objects.filter(pk=self.ride.pk).update(ride_status='cancelled')
+
+    def test_ride_detail_404(self):
+        response = self.client.get(reverse('ride_detail', args=[self.ride.id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_join_404(self):
+        other = make_user('other@eco.com')
+        self.client.force_login(other)
+        response = self.join()
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(RidePassenger.objects.filter(ride=self.ride, user=other).exists())
+
+    def test_update_location_404(self):
+        response = self.client.post(reverse('update_location'), {
+            'ride_id': self.ride.id,
+            'latitude': '10.0',
+            'longitude': '76.3',
+            'is_sharing': 'true',
+        })
+        self.assertEqual(response.status_code, 404)
+
+
+class AdminCancelRideTests(RideTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(make_user('admin@eco.com', is_staff=True))
+
+    def cancel(self):
+        self.client.post(reverse('admin_cancel_ride', args=[self.ride.id]))
+        self.ride.refresh_from_db()
+        return self.ride.ride_status
+
+    def test_cancels_active_ride(self):
+        self.assertEqual(self.cancel(), 'cancelled')
+
+    def test_refuses_completed_ride(self):
+        Ride.objects.filter(pk=self.ride.pk).update(ride_status='completed')
+        self.assertEqual(self.cancel(), 'completed')
+
+
+class TwoSideConfirmationTests(RideTestCase):
+    def setUp(self):
+        super().setUp()
+        self.join()
+        self.driver_client = self.client_class()
+        self.driver_client.force_login(self.driver)
+
+    def status(self):
+        self.ride.refresh_from_db()
+        return self.ride.ride_status
+
+    def test_start_needs_both_sides(self):
+        self.driver_client.post(reverse('driver_start_ride', args=[self.ride.id]))
+        self.assertEqual(self.status(), 'created')
+        self.assertTrue(self.ride.driver_started)
+
+        self.client.post(reverse('passenger_confirm_start', args=[self.ride.id]))
+        self.assertEqual(self.status(), 'started')
+
+    def test_start_passenger_first(self):
+        self.client.post(reverse('passenger_confirm_start', args=[self.ride.id]))
+        self.assertEqual(self.status(), 'created')
+
+        self.driver_client.post(reverse('driver_start_ride', args=[self.ride.id]))
+        self.assertEqual(self.status(), 'started')
+
+    def test_end_needs_both_sides(self):
+        Ride.objects.filter(pk=self.ride.pk).update(
+            ride_status='started', driver_started=True, passenger_started=True
+        )
+        self.client.post(reverse('passenger_confirm_arrival', args=[self.ride.id]))
+        self.assertEqual(self.status(), 'started')
+        self.assertTrue(self.ride.passenger_ended)
+
+        self.driver_client.post(reverse('driver_end_ride', args=[self.ride.id]))
+        self.assertEqual(self.status(), 'completed')
 
-# Create your tests here.
+    def test_end_refused_before_start(self):
+        response = self.driver_client.post(reverse('driver_end_ride', args=[self.ride.id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.status(), 'created')
+        self.assertFalse(self.ride.driver_ended)
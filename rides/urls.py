@@ -40,6 +40,7 @@ urlpatterns = [
     path('custom-admin/users/', views.admin_users_list, name='admin_users_list'),
     path('custom-admin/users/<int:user_id>/toggle-status/', views.admin_toggle_user_status, name='admin_toggle_user_status'),
     path('custom-admin/rides/', views.admin_rides_list, name='admin_rides_list'),
+    path('custom-admin/rides/export/', views.admin_rides_export, name='admin_rides_export'),
     path('custom-admin/rides/<int:ride_id>/', views.admin_ride_detail, name='admin_ride_detail'),
     path('custom-admin/rides/<int:ride_id>/cancel/', views.admin_cancel_ride, name='admin_cancel_ride'),
     path('custom-admin/trips/ongoing/', views.admin_trips_ongoing, name='admin_trips_ongoing'),
@@ -3,15 +3,25 @@ from django.contrib.auth import login as auth_login, logout as auth_logout, auth
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q
-from django.core.mail import send_mail
-from django.http import JsonResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from datetime import datetime
-from .models import Ride, RidePassenger, EMISSION_FACTORS, UserProfile, LiveLocation
+from functools import lru_cache, wraps
+from itertools import chain
+import csv
+import logging
+import time
+from .models import Ride, RidePassenger, EMISSION_FACTOR_TABLE, VEHICLE_IDS, VehicleType, UserProfile, LiveLocation, PHONE_NUMBER_RE, phone_digits
 from .aadhaar_service import get_aadhaar_service
+from .tasks import send_join_notification
+
+logger = logging.getLogger(__name__)
 
 
 def landing(request):
@@ -19,14 +29,37 @@ def landing(request):
     return render(request, 'rides/landing.html')
 
 
+# Unknown vehicle types fall back to car_petrol; bound once at import time
+_DEFAULT_VEHICLE_ID = VehicleType.CAR_PETROL
+
+
+@lru_cache(maxsize=2048)
 def calculate_co2(distance_km, vehicle_type, occupants):
-    """Calculate CO2 emissions for a ride."""
-    factor = EMISSION_FACTORS.get(vehicle_type, EMISSION_FACTORS["car_petrol"])
-    solo_kg = (distance_km * factor) / 1000
-    occupants = max(occupants, 1)
-    shared_kg = solo_kg / occupants
-    saved_per_user = solo_kg - shared_kg
-    return solo_kg, shared_kg, saved_per_user
+    """Calculate CO2 emissions for a ride (pure, so results are memoized)."""
+    solo_kg = distance_km * EMISSION_FACTOR_TABLE[VEHICLE_IDS.get(vehicle_type, _DEFAULT_VEHICLE_ID)]
+    shared_kg = solo_kg / occupants if occupants > 0 else solo_kg
+    return solo_kg, shared_kg, solo_kg - shared_kg
+
+
+RIDES_PER_PAGE = 25
+ADMIN_USERS_PER_PAGE = 50
+ADMIN_RIDES_PER_PAGE = 25
+
+
+# Dashboard CO2 figures only change when a ride is created, joined, left or
+# removed, so they are cached per user and dropped on those writes.
+DASHBOARD_CO2_CACHE_TIMEOUT = 300
+
+
+def _dashboard_co2_cache_key(user_id):
+    return f'dashboard:co2:{user_id}'
+
+
+def invalidate_dashboard_co2(ride, *extra_user_ids):
+    """Drop cached dashboard CO2 figures for the driver and passengers of a ride."""
+    user_ids = {ride.creator_id, *extra_user_ids}
+    user_ids.update(ride.passengers.values_list('user_id', flat=True))
+    cache.delete_many([_dashboard_co2_cache_key(user_id) for user_id in user_ids])
 
 
 def register(request):
@@ -45,9 +78,8 @@ def register(request):
             return redirect('register')
         
         # Validate phone number format
-        import re
-        cleaned_phone = ''.join(filter(str.isdigit, phone_number))
-        if not re.match(r'^91\d{10}$', cleaned_phone):
+        cleaned_phone = phone_digits(phone_number)
+        if not PHONE_NUMBER_RE.match(cleaned_phone):
             messages.error(request, 'Phone number must start with 91 and contain exactly 12 digits (e.g., 919876543210)')
             return redirect('register')
         
@@ -66,7 +98,7 @@ def register(request):
         profile = user.profile
         profile.phone_number = cleaned_phone
         profile.id_proof_number = id_proof_number
-        profile.save()
+        profile.save(update_fields=['phone_number', 'id_proof_number'])
         
         auth_login(request, user)
         messages.success(request, 'Welcome to EcoCommute!')
@@ -106,33 +138,42 @@ def user_logout(request):
 
 @login_required
 def dashboard(request):
-    created_rides = Ride.objects.filter(creator=request.user).prefetch_related('passengers').order_by('ride_date', 'ride_time')
-    joined_ride_passengers = RidePassenger.objects.filter(user=request.user).select_related('ride').order_by('ride__ride_date', 'ride__ride_time')
-    
-    total_saved = 0.0
+    # Rides cancelled by an admin are kept for the record but no longer
+    # belong to anyone's dashboard (or their CO2 savings)
+    created_rides = Ride.objects.active().filter(creator=request.user).prefetch_related('passengers').order_by('ride_date', 'ride_time')
+    # The template shows the driver's email for each joined ride, so pull the
+    # creator in the same JOIN instead of one lazy query per row.
+    joined_ride_passengers = RidePassenger.objects.filter(user=request.user).exclude(ride__ride_status='cancelled').select_related('ride', 'ride__creator').order_by('ride__ride_date', 'ride__ride_time')
+    
+    rides_with_role = [(ride, 'Driver') for ride in created_rides]
+    rides_with_role += [(rp.ride, 'Passenger') for rp in joined_ride_passengers]
+    
+    # Recompute when nothing is cached or the user's set of rides changed
+    # through a path that did not invalidate (e.g. the Django admin).
+    co2_cache_key = _dashboard_co2_cache_key(request.user.id)
+    co2 = cache.get(co2_cache_key)
+    if co2 is None or co2['by_ride'].keys() != {ride.id for ride, _ in rides_with_role}:
+        by_ride = {
+            ride.id: calculate_co2(ride.distance_km, ride.vehicle_type, ride.occupant_count)
+            for ride, _ in rides_with_role
+        }
+        co2 = {
+            'by_ride': by_ride,
+            'total_saved': sum((saved for _, _, saved in by_ride.values()), 0.0),
+        }
+        cache.set(co2_cache_key, co2, DASHBOARD_CO2_CACHE_TIMEOUT)
+    
+    total_saved = co2['total_saved']
     ride_summaries = []
     
-    for ride in created_rides:
-        solo, shared, saved = calculate_co2(ride.distance_km, ride.vehicle_type, ride.occupant_count)
-        total_saved += saved
+    for ride, role in rides_with_role:
+        solo, shared, saved = co2['by_ride'][ride.id]
         ride_summaries.append({
             'ride': ride,
             'solo': solo,
             'shared': shared,
             'saved': saved,
-            'role': 'Driver'
-        })
-    
-    for rp in joined_ride_passengers:
-        ride = rp.ride
-        solo, shared, saved = calculate_co2(ride.distance_km, ride.vehicle_type, ride.occupant_count)
-        total_saved += saved
-        ride_summaries.append({
-            'ride': ride,
-            'solo': solo,
-            'shared': shared,
-            'saved': saved,
-            'role': 'Passenger'
+            'role': role
         })
     
     badge_earned = total_saved > 5
@@ -149,8 +190,22 @@ def dashboard(request):
 
 @login_required
 def rides_list(request):
-    # Start with all rides, sorted by newest first
-    rides = Ride.objects.all().order_by('-created_at', 'ride_date', 'ride_time')
+    # Start with upcoming rides, sorted by newest first. Whether the current
+    # user has joined each ride is computed in the same SELECT. The template
+    # only compares creator_id against the current user, so no JOIN to
+    # auth_user is needed. Rows come back as plain dicts holding just the
+    # columns the list renders, so no Ride instances are built per row.
+    joined = RidePassenger.objects.filter(ride=OuterRef('pk'), user=request.user)
+    rides = (
+        Ride.objects.active().filter(ride_date__gte=timezone.localdate())
+        .annotate(has_joined=Exists(joined))
+        .order_by('-created_at', 'ride_date', 'ride_time')
+        .values(
+            'id', 'from_location', 'to_location', 'ride_date', 'ride_time', 'vehicle_type',
+            'distance_km', 'total_seats', 'seats_available', 'creator_id', 'created_at',
+            'has_joined',
+        )
+    )
     
     # Get filter parameters from GET request
     from_location = request.GET.get('from_location', '').strip()
@@ -163,12 +218,12 @@ def rides_list(request):
     if to_location:
         rides = rides.filter(to_location__icontains=to_location)
     
-    # Get joined ride IDs for current user
-    joined_ids = set(RidePassenger.objects.filter(user=request.user).values_list('ride_id', flat=True))
+    # Only the current page of rides is fetched (LIMIT/OFFSET)
+    page_obj = Paginator(rides, RIDES_PER_PAGE).get_page(request.GET.get('page'))
     
     context = {
-        'rides': rides,
-        'joined_ids': joined_ids,
+        'rides': page_obj,
+        'page_obj': page_obj,
         'from_location': from_location,
         'to_location': to_location,
     }
@@ -178,45 +233,61 @@ def rides_list(request):
 @login_required
 def ride_detail(request, ride_id):
     """View ride details with passenger information."""
-    ride = get_object_or_404(Ride, id=ride_id)
-    passengers = ride.passengers.select_related('user', 'user__profile').all()
-    is_creator = ride.creator == request.user
-    has_joined = RidePassenger.objects.filter(ride=ride, user=request.user).exists()
-    
-    # Add WhatsApp messages and phone number for each passenger (for creator notifications)
-    for passenger in passengers:
-        # Get phone number from user profile (international format: 919876543210)
-        # Clean phone number: remove all non-digit characters (spaces, dashes, brackets, etc.)
-        phone = passenger.user.profile.phone_number if passenger.user.profile.phone_number else None
-        if phone:
-            # Remove all non-digit characters
-            cleaned_phone = ''.join(filter(str.isdigit, phone))
-            passenger.whatsapp_phone = cleaned_phone if cleaned_phone else None
-        else:
-            passenger.whatsapp_phone = None
-        
-        # Message 1: Start Ride Notification
-        passenger.start_ride_message = (
-            f"🚗 RIDE STARTED! 🚗\n\n"
-            f"Hi {passenger.user.email}!\n\n"
-            f"Your ride from {ride.from_location} to {ride.to_location} has started.\n\n"
-            f"📌 Pickup Point: {passenger.pickup_point}\n"
-            f"🕐 Expected Time: {ride.ride_time.strftime('%H:%M')}\n\n"
-            f"I'm on my way to pick you up!\n\n"
-            f"- {ride.creator.email}"
+    ride = get_object_or_404(
+        Ride.objects.active().select_related('creator'), id=ride_id
+    )
+    # Only the columns the page and WhatsApp messages use; the FKs stay
+    # loaded so select_related can attach user and profile
+    passengers = list(
+        ride.passengers.select_related('user', 'user__profile').only(
+            'pickup_point', 'pickup_notes', 'joined_at', 'ride', 'user__email',
+            'user__profile__user', 'user__profile__phone_number',
         )
+    )
+    is_creator = ride.creator_id == request.user.id
+    has_joined = any(passenger.user_id == request.user.id for passenger in passengers)
+    
+    # WhatsApp links are only rendered for the driver, and only for
+    # passengers with a phone number, so build the messages just for those
+    if is_creator:
+        # Ride details are the same in every passenger's messages, so format
+        # them (including the strftime calls) once
+        route = f"{ride.from_location} → {ride.to_location}"
+        ride_time = ride.ride_time.strftime('%H:%M')
+        ride_date = ride.ride_date.strftime('%B %d, %Y')
+        signature = f"- {ride.creator.email}"
+        start_ride_intro = f"Your ride from {ride.from_location} to {ride.to_location} has started.\n\n"
         
-        # Message 2: General Ride Details
-        passenger.whatsapp_message = (
-            f"Hi {passenger.user.email}! 🚗\n\n"
-            f"Ride Details:\n"
-            f"📍 Route: {ride.from_location} → {ride.to_location}\n"
-            f"📅 Date: {ride.ride_date.strftime('%B %d, %Y')}\n"
-            f"🕐 Time: {ride.ride_time.strftime('%H:%M')}\n"
-            f"📌 Your Pickup Point: {passenger.pickup_point}\n\n"
-            f"See you soon!\n"
-            f"- {ride.creator.email}"
-        )
+        for passenger in passengers:
+            # Get phone number from user profile (international format: 919876543210)
+            # Clean phone number: remove all non-digit characters (spaces, dashes, brackets, etc.)
+            phone = passenger.user.profile.phone_number
+            passenger.whatsapp_phone = phone_digits(phone) if phone else None
+            if not passenger.whatsapp_phone:
+                continue
+            
+            # Message 1: Start Ride Notification
+            passenger.start_ride_message = (
+                f"🚗 RIDE STARTED! 🚗\n\n"
+                f"Hi {passenger.user.email}!\n\n"
+                f"{start_ride_intro}"
+                f"📌 Pickup Point: {passenger.pickup_point}\n"
+                f"🕐 Expected Time: {ride_time}\n\n"
+                f"I'm on my way to pick you up!\n\n"
+                f"{signature}"
+            )
+            
+            # Message 2: General Ride Details
+            passenger.whatsapp_message = (
+                f"Hi {passenger.user.email}! 🚗\n\n"
+                f"Ride Details:\n"
+                f"📍 Route: {route}\n"
+                f"📅 Date: {ride_date}\n"
+                f"🕐 Time: {ride_time}\n"
+                f"📌 Your Pickup Point: {passenger.pickup_point}\n\n"
+                f"See you soon!\n"
+                f"{signature}"
+            )
     
     context = {
         'ride': ride,
@@ -271,12 +342,31 @@ def create_ride(request):
             seats_available=seats_available,
             creator=request.user
         )
+        invalidate_dashboard_co2(ride)
         messages.success(request, 'Ride created.')
         return redirect('rides_list')
     
     return render(request, 'rides/create_ride.html')
 
 
+def _get_passenger_with_ride(ride_id, user):
+    """
+    Return the user's RidePassenger row for a ride with the ride JOINed in,
+    or None if they have not joined it. Raises Http404 if the ride does not
+    exist or was cancelled, so callers keep their 404 behaviour with one query
+    on the happy path.
+    """
+    passenger = (
+        RidePassenger.objects.select_related('ride')
+        .filter(ride_id=ride_id, user=user)
+        .exclude(ride__ride_status='cancelled')
+        .first()
+    )
+    if passenger is None:
+        get_object_or_404(Ride.objects.active(), id=ride_id)
+    return passenger
+
+
 @login_required
 def join_ride(request, ride_id):
     # AADHAAR VERIFICATION CHECK: Required to join rides
@@ -284,10 +374,10 @@ def join_ride(request, ride_id):
         messages.warning(request, 'Please verify your Aadhaar to join rides.')
         return redirect('aadhaar_verification_start')
     
-    ride = get_object_or_404(Ride, id=ride_id)
+    ride = get_object_or_404(Ride.objects.active(), id=ride_id)
     
     if request.method == 'POST':
-        if ride.creator == request.user:
+        if ride.creator_id == request.user.id:
             messages.info(request, 'You are the driver for this ride.')
             return redirect('rides_list')
         
@@ -295,10 +385,6 @@ def join_ride(request, ride_id):
             messages.warning(request, 'No seats available.')
             return redirect('rides_list')
         
-        if RidePassenger.objects.filter(ride=ride, user=request.user).exists():
-            messages.info(request, 'You have already joined this ride.')
-            return redirect('rides_list')
-        
         # Get pickup point data
         pickup_point = request.POST.get('pickup_point', '').strip()
         pickup_notes = request.POST.get('pickup_notes', '').strip()
@@ -307,60 +393,37 @@ def join_ride(request, ride_id):
             messages.error(request, 'Please enter a pickup point.')
             return render(request, 'rides/join_ride.html', {'ride': ride})
         
-        ride.seats_available -= 1
-        ride.save()
+        # Claim a seat and add the passenger in one transaction. The
+        # conditional UPDATE cannot take the last seat twice under concurrent
+        # joins, and the unique (user, ride) constraint rejects a second join
+        # without a separate existence check.
+        try:
+            with transaction.atomic():
+                claimed = Ride.objects.filter(pk=ride.pk, seats_available__gt=0).update(
+                    seats_available=F('seats_available') - 1
+                )
+                if not claimed:
+                    messages.warning(request, 'No seats available.')
+                    return redirect('rides_list')
+                
+                RidePassenger.objects.create(
+                    user=request.user, 
+                    ride=ride,
+                    pickup_point=pickup_point,
+                    pickup_notes=pickup_notes
+                )
+        except IntegrityError:
+            messages.info(request, 'You have already joined this ride.')
+            return redirect('rides_list')
         
-        RidePassenger.objects.create(
-            user=request.user, 
-            ride=ride,
-            pickup_point=pickup_point,
-            pickup_notes=pickup_notes
-        )
+        invalidate_dashboard_co2(ride)
         
-        # Send email notification to ride creator
+        # Notify the ride creator by email off the request path
         try:
-            email_subject = f"New Passenger Joined Your Ride - {ride.from_location} to {ride.to_location}"
-            
-            email_message = f"""Hello {ride.creator.email},
-
-Great news! A passenger has joined your ride.
-
-🚗 Ride Details:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Route: {ride.from_location} → {ride.to_location}
-Date: {ride.ride_date}
-Time: {ride.ride_time.strftime('%H:%M')}
-
-👤 Passenger Information:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Name/Email: {request.user.email}
-Pickup Point: {pickup_point}
-{f'Notes: {pickup_notes}' if pickup_notes else ''}
-
-📊 Current Status:
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-Seats Available: {ride.seats_available}/{ride.total_seats}
-
-Please check your dashboard for complete details:
-http://127.0.0.1:8000/dashboard/
-
-Thank you for choosing EcoCommute!
-🌱 Together, we're making commuting more sustainable.
-
----
-EcoCommute Team
-"""
-            
-            send_mail(
-                subject=email_subject,
-                message=email_message,
-                from_email=None,  # Uses DEFAULT_FROM_EMAIL from settings
-                recipient_list=[ride.creator.email],
-                fail_silently=True  # Don't break the join flow if email fails
-            )
-        except Exception as e:
+            send_join_notification.enqueue(ride.id, request.user.id, pickup_point, pickup_notes)
+        except Exception:
             # Log error but don't fail the ride join
-            pass
+            logger.exception(f"Error enqueuing join notification for ride {ride.id}")
         
         messages.success(request, 'Joined ride successfully!')
         return redirect('rides_list')
@@ -373,16 +436,21 @@ EcoCommute Team
 def cancel_ride(request, ride_id):
     """Leave a joined ride from dashboard."""
     if request.method == 'POST':
-        ride = get_object_or_404(Ride, id=ride_id)
-        
-        passenger = RidePassenger.objects.filter(ride=ride, user=request.user).first()
+        passenger = _get_passenger_with_ride(ride_id, request.user)
         if not passenger:
             messages.warning(request, 'You have not joined this ride.')
             return redirect('dashboard')
         
-        passenger.delete()
-        ride.seats_available += 1
-        ride.save()
+        ride = passenger.ride
+        # Remove the passenger and release the seat together. The seat is
+        # released in SQL so concurrent leaves/joins cannot overwrite each
+        # other's count, and only if this request actually deleted the row,
+        # so a double-submitted leave cannot free two seats.
+        with transaction.atomic():
+            deleted, _ = passenger.delete()
+            if deleted:
+                Ride.objects.filter(pk=ride.pk).update(seats_available=F('seats_available') + 1)
+        invalidate_dashboard_co2(ride, request.user.id)
         
         messages.success(request, 'You have left the ride.')
         return redirect('dashboard')
@@ -394,16 +462,21 @@ def cancel_ride(request, ride_id):
 def leave_ride(request, ride_id):
     """Leave a joined ride from rides list."""
     if request.method == 'POST':
-        ride = get_object_or_404(Ride, id=ride_id)
-        
-        passenger = RidePassenger.objects.filter(ride=ride, user=request.user).first()
+        passenger = _get_passenger_with_ride(ride_id, request.user)
         if not passenger:
             messages.warning(request, 'You have not joined this ride.')
             return redirect('rides_list')
         
-        passenger.delete()
-        ride.seats_available += 1
-        ride.save()
+        ride = passenger.ride
+        # Remove the passenger and release the seat together. The seat is
+        # released in SQL so concurrent leaves/joins cannot overwrite each
+        # other's count, and only if this request actually deleted the row,
+        # so a double-submitted leave cannot free two seats.
+        with transaction.atomic():
+            deleted, _ = passenger.delete()
+            if deleted:
+                Ride.objects.filter(pk=ride.pk).update(seats_available=F('seats_available') + 1)
+        invalidate_dashboard_co2(ride, request.user.id)
         
         messages.success(request, 'You have left the ride.')
         return redirect('rides_list')
@@ -417,6 +490,11 @@ def delete_ride(request, ride_id):
     if request.method == 'POST':
         ride = get_object_or_404(Ride, id=ride_id)
         
+        # Cancelled rides are kept on record for the admins
+        if ride.ride_status == 'cancelled':
+            messages.error(request, 'This ride was cancelled and cannot be deleted.')
+            return redirect('dashboard')
+        
         # Only the creator can delete the ride
         if ride.creator != request.user:
             messages.error(request, 'You can only delete your own rides.')
@@ -428,6 +506,7 @@ def delete_ride(request, ride_id):
             messages.warning(request, f'Cannot delete ride. {passenger_count} passenger(s) have already joined.')
             return redirect('dashboard')
         
+        invalidate_dashboard_co2(ride)
         ride.delete()
         messages.success(request, 'Ride deleted successfully.')
         return redirect('dashboard')
@@ -441,62 +520,52 @@ def delete_ride(request, ride_id):
 @require_http_methods(["POST"])
 def driver_start_ride(request, ride_id):
     """Driver confirms ride start."""
-    ride = get_object_or_404(Ride, id=ride_id)
-    
-    # Only the driver can start
-    if ride.creator != request.user:
-        return JsonResponse({'error': 'Only the driver can start the ride'}, status=403)
-    
-    # Can't start if already started or completed
-    if ride.ride_status != 'created':
-        return JsonResponse({'error': 'Ride has already been started or completed'}, status=400)
-    
-    # Can't start if already confirmed
-    if ride.driver_started:
+    # Record the confirmation in one conditional UPDATE; only look the ride
+    # up to explain why when it does not apply
+    if not Ride.objects.confirm(ride_id, 'driver_started', 'created', creator=request.user):
+        ride = get_object_or_404(Ride.objects.active(), id=ride_id)
+        
+        # Only the driver can start
+        if ride.creator_id != request.user.id:
+            return JsonResponse({'error': 'Only the driver can start the ride'}, status=403)
+        
+        # Can't start if already started or completed
+        if ride.ride_status != 'created':
+            return JsonResponse({'error': 'Ride has already been started or completed'}, status=400)
+        
+        # Can't start if already confirmed
         return JsonResponse({'error': 'You have already confirmed the start'}, status=400)
     
-    # Set driver confirmation
-    ride.driver_started = True
-    ride.save()
-    
     # Check and update status
-    status_changed = ride.check_and_update_status()
-    
-    if status_changed == 'started':
+    if Ride.objects.advance_status(ride_id, 'created', 'started', 'driver_started', 'passenger_started'):
         messages.success(request, '🚗 Ride started! Location sharing is now enabled.')
     else:
         messages.info(request, '✅ You confirmed the start. Waiting for passenger confirmation.')
     
-    return redirect('ride_detail', ride_id=ride.id)
+    return redirect('ride_detail', ride_id=ride_id)
 
 
 @login_required
 @require_http_methods(["POST"])
 def passenger_confirm_start(request, ride_id):
     """Passenger confirms ride start."""
-    ride = get_object_or_404(Ride, id=ride_id)
-    
     # Check if user is a passenger
-    passenger = RidePassenger.objects.filter(ride=ride, user=request.user).first()
+    passenger = _get_passenger_with_ride(ride_id, request.user)
     if not passenger:
         return JsonResponse({'error': 'Only passengers can confirm the start'}, status=403)
-    
-    # Can't start if already started or completed
-    if ride.ride_status != 'created':
-        return JsonResponse({'error': 'Ride has already been started or completed'}, status=400)
-    
-    # Can't start if already confirmed
-    if ride.passenger_started:
-        return JsonResponse({'error': 'You have already confirmed the start'}, status=400)
+    ride = passenger.ride
     
     # Set passenger confirmation
-    ride.passenger_started = True
-    ride.save()
+    if not Ride.objects.confirm(ride.id, 'passenger_started', 'created'):
+        # Can't start if already started or completed
+        if ride.ride_status != 'created':
+            return JsonResponse({'error': 'Ride has already been started or completed'}, status=400)
+        
+        # Can't start if already confirmed
+        return JsonResponse({'error': 'You have already confirmed the start'}, status=400)
     
     # Check and update status
-    status_changed = ride.check_and_update_status()
-    
-    if status_changed == 'started':
+    if Ride.objects.advance_status(ride.id, 'created', 'started', 'driver_started', 'passenger_started'):
         messages.success(request, '🚗 Ride started! You can now share your location.')
     else:
         messages.info(request, '✅ You confirmed the start. Waiting for driver confirmation.')
@@ -508,62 +577,52 @@ def passenger_confirm_start(request, ride_id):
 @require_http_methods(["POST"])
 def driver_end_ride(request, ride_id):
     """Driver confirms ride end."""
-    ride = get_object_or_404(Ride, id=ride_id)
-    
-    # Only the driver can end
-    if ride.creator != request.user:
-        return JsonResponse({'error': 'Only the driver can end the ride'}, status=403)
-    
-    # Can only end started rides
-    if ride.ride_status != 'started':
-        return JsonResponse({'error': 'Ride must be started before it can be ended'}, status=400)
-    
-    # Can't end if already confirmed
-    if ride.driver_ended:
+    # Record the confirmation in one conditional UPDATE; only look the ride
+    # up to explain why when it does not apply
+    if not Ride.objects.confirm(ride_id, 'driver_ended', 'started', creator=request.user):
+        ride = get_object_or_404(Ride.objects.active(), id=ride_id)
+        
+        # Only the driver can end
+        if ride.creator_id != request.user.id:
+            return JsonResponse({'error': 'Only the driver can end the ride'}, status=403)
+        
+        # Can only end started rides
+        if ride.ride_status != 'started':
+            return JsonResponse({'error': 'Ride must be started before it can be ended'}, status=400)
+        
+        # Can't end if already confirmed
         return JsonResponse({'error': 'You have already confirmed the end'}, status=400)
     
-    # Set driver confirmation
-    ride.driver_ended = True
-    ride.save()
-    
     # Check and update status
-    status_changed = ride.check_and_update_status()
-    
-    if status_changed == 'completed':
+    if Ride.objects.advance_status(ride_id, 'started', 'completed', 'driver_ended', 'passenger_ended'):
         messages.success(request, '🏁 Ride completed! Thank you for carpooling.')
     else:
         messages.info(request, '✅ You confirmed arrival. Waiting for passenger confirmation.')
     
-    return redirect('ride_detail', ride_id=ride.id)
+    return redirect('ride_detail', ride_id=ride_id)
 
 
 @login_required
 @require_http_methods(["POST"])
 def passenger_confirm_arrival(request, ride_id):
     """Passenger confirms arrival (ride end)."""
-    ride = get_object_or_404(Ride, id=ride_id)
-    
     # Check if user is a passenger
-    passenger = RidePassenger.objects.filter(ride=ride, user=request.user).first()
+    passenger = _get_passenger_with_ride(ride_id, request.user)
     if not passenger:
         return JsonResponse({'error': 'Only passengers can confirm arrival'}, status=403)
-    
-    # Can only end started rides
-    if ride.ride_status != 'started':
-        return JsonResponse({'error': 'Ride must be started before it can be ended'}, status=400)
-    
-    # Can't end if already confirmed
-    if ride.passenger_ended:
-        return JsonResponse({'error': 'You have already confirmed arrival'}, status=400)
+    ride = passenger.ride
     
     # Set passenger confirmation
-    ride.passenger_ended = True
-    ride.save()
+    if not Ride.objects.confirm(ride.id, 'passenger_ended', 'started'):
+        # Can only end started rides
+        if ride.ride_status != 'started':
+            return JsonResponse({'error': 'Ride must be started before it can be ended'}, status=400)
+        
+        # Can't end if already confirmed
+        return JsonResponse({'error': 'You have already confirmed arrival'}, status=400)
     
     # Check and update status
-    status_changed = ride.check_and_update_status()
-    
-    if status_changed == 'completed':
+    if Ride.objects.advance_status(ride.id, 'started', 'completed', 'driver_ended', 'passenger_ended'):
         messages.success(request, '🏁 Ride completed! Thank you for carpooling.')
     else:
         messages.info(request, '✅ You confirmed arrival. Waiting for driver confirmation.')
@@ -573,6 +632,20 @@ def passenger_confirm_arrival(request, ride_id):
 
 # ==================== LIVE LOCATION TRACKING VIEWS ====================
 
+# Minimum seconds between stored location updates for one user
+LOCATION_UPDATE_INTERVAL = 5
+# How long the last known location is kept in the cache
+LIVE_LOCATION_CACHE_TIMEOUT = 60 * 60
+
+
+def _location_throttle_key(user_id):
+    return f'location:last_write:{user_id}'
+
+
+def _live_location_cache_key(user_id):
+    return f'location:latest:{user_id}'
+
+
 @login_required
 @require_http_methods(["POST"])
 def update_location(request):
@@ -598,21 +671,60 @@ def update_location(request):
         except ValueError:
             return JsonResponse({'error': 'Invalid coordinates'}, status=400)
         
+        # Phones report positions far more often than the tracking map
+        # polls, so the database is written at most once per
+        # LOCATION_UPDATE_INTERVAL per user and ride. Every ping still
+        # replaces the last known location in the cache, which get_location
+        # reads first, so the latest fix is never lost.
+        throttle_key = _location_throttle_key(request.user.id)
+        if is_sharing and cache.get(throttle_key) == ride_id:
+            updated_at = timezone.now()
+            cache.set(_live_location_cache_key(request.user.id), {
+                'ride_id': ride_id,
+                'latitude': latitude,
+                'longitude': longitude,
+                'is_sharing': True,
+                'updated_at': updated_at,
+            }, LIVE_LOCATION_CACHE_TIMEOUT)
+            return JsonResponse({
+                'success': True,
+                'throttled': True,
+                'message': 'Location updated (cached, database write skipped)',
+                'latitude': latitude,
+                'longitude': longitude,
+                'updated_at': updated_at.isoformat(),
+            })
+        
         # Verify ride exists and user is a passenger
-        ride = get_object_or_404(Ride, id=ride_id)
-        if not RidePassenger.objects.filter(ride=ride, user=request.user).exists():
+        passenger = _get_passenger_with_ride(ride_id, request.user)
+        if not passenger:
             return JsonResponse({'error': 'User is not a passenger in this ride'}, status=403)
+        ride = passenger.ride
         
-        # Update or create location (OneToOne ensures only one record per user)
-        location, created = LiveLocation.objects.update_or_create(
+        # Upsert the location in one statement (INSERT ... ON CONFLICT DO
+        # UPDATE); the OneToOne on user ensures only one record per user
+        location = LiveLocation(
             user=request.user,
-            defaults={
-                'ride': ride,
-                'latitude': latitude,
-                'longitude': longitude,
-                'is_sharing': is_sharing,
-            }
+            ride=ride,
+            latitude=latitude,
+            longitude=longitude,
+            is_sharing=is_sharing,
         )
+        LiveLocation.objects.bulk_create(
+            [location],
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['ride', 'latitude', 'longitude', 'is_sharing', 'updated_at'],
+        )
+        cache.set(_live_location_cache_key(request.user.id), {
+            'ride_id': str(ride.id),
+            'latitude': location.latitude,
+            'longitude': location.longitude,
+            'is_sharing': is_sharing,
+            'updated_at': location.updated_at,
+        }, LIVE_LOCATION_CACHE_TIMEOUT)
+        if is_sharing:
+            cache.set(throttle_key, str(ride.id), LOCATION_UPDATE_INTERVAL)
         
         return JsonResponse({
             'success': True,
@@ -622,6 +734,9 @@ def update_location(request):
             'updated_at': location.updated_at.isoformat(),
         })
         
+    except Http404:
+        # Missing or cancelled ride: a real 404, not a 500
+        raise
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -636,7 +751,7 @@ def get_location(request, user_id, ride_id):
     """
     try:
         # Verify the ride exists and requester is the creator
-        ride = get_object_or_404(Ride, id=ride_id)
+        ride = get_object_or_404(Ride.objects.active(), id=ride_id)
         if ride.creator != request.user:
             return JsonResponse({'error': 'Only ride creator can view locations'}, status=403)
         
@@ -645,28 +760,37 @@ def get_location(request, user_id, ride_id):
         if not RidePassenger.objects.filter(ride=ride, user=passenger_user).exists():
             return JsonResponse({'error': 'User is not a passenger in this ride'}, status=404)
         
-        # Get live location if sharing is enabled
-        try:
-            location = LiveLocation.objects.get(
+        # The cache holds the newest fix, including pings whose database
+        # write was throttled; fall back to the stored row
+        location = cache.get(_live_location_cache_key(passenger_user.id))
+        if location is None or location['ride_id'] != str(ride.id):
+            # Get live location if sharing is enabled (only the columns we return)
+            location = LiveLocation.objects.filter(
                 user=passenger_user,
                 ride=ride,
                 is_sharing=True  # Only return if user has consented to share
-            )
-            
-            return JsonResponse({
-                'success': True,
-                'user_id': user_id,
-                'user_email': passenger_user.email,
-                'latitude': location.latitude,
-                'longitude': location.longitude,
-                'updated_at': location.updated_at.isoformat(),
-            })
-            
-        except LiveLocation.DoesNotExist:
+            ).values('latitude', 'longitude', 'updated_at').first()
+        elif not location['is_sharing']:
+            # Only return if user has consented to share
+            location = None
+        
+        if location is None:
             return JsonResponse({
                 'error': 'Location not available or sharing disabled'
             }, status=404)
+        
+        return JsonResponse({
+            'success': True,
+            'user_id': user_id,
+            'user_email': passenger_user.email,
+            'latitude': location['latitude'],
+            'longitude': location['longitude'],
+            'updated_at': location['updated_at'].isoformat(),
+        })
             
+    except Http404:
+        # Missing or cancelled ride: a real 404, not a 500
+        raise
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
@@ -681,6 +805,11 @@ def stop_location_sharing(request):
     try:
         # Delete the user's live location
         deleted_count, _ = LiveLocation.objects.filter(user=request.user).delete()
+        # Let the next share start writing immediately
+        cache.delete_many([
+            _location_throttle_key(request.user.id),
+            _live_location_cache_key(request.user.id),
+        ])
         
         if deleted_count > 0:
             return JsonResponse({
@@ -703,15 +832,18 @@ def track_ride(request, ride_id):
     View for ride creator to track live locations of all passengers.
     Displays a map with real-time location updates.
     """
-    ride = get_object_or_404(Ride, id=ride_id)
+    ride = get_object_or_404(Ride.objects.active(), id=ride_id)
     
-    # Only ride creator can access tracking
-    if ride.creator != request.user:
+    # Only ride creator can access tracking (compare ids, no creator fetch)
+    if ride.creator_id != request.user.id:
         messages.error(request, 'Only ride creator can track passengers')
         return redirect('ride_detail', ride_id=ride_id)
     
-    # Get all passengers in this ride
-    passengers = RidePassenger.objects.filter(ride=ride).select_related('user')
+    # Get all passengers in this ride; the page only shows their id and
+    # email, and evaluating once lets the template count without a query
+    passengers = list(
+        ride.passengers.select_related('user').only('ride', 'user__email')
+    )
     
     context = {
         'ride': ride,
@@ -726,29 +858,69 @@ def share_location_view(request, ride_id):
     View for passengers to share their live location during a ride.
     Provides UI to start/stop location sharing.
     """
-    ride = get_object_or_404(Ride, id=ride_id)
+    # Fetch the ride together with whether the user is a passenger and is
+    # already sharing their location, in a single query
+    ride = get_object_or_404(
+        Ride.objects.active().annotate(
+            is_passenger=Exists(
+                RidePassenger.objects.filter(ride=OuterRef('pk'), user=request.user)
+            ),
+            is_currently_sharing=Exists(
+                LiveLocation.objects.filter(ride=OuterRef('pk'), user=request.user, is_sharing=True)
+            ),
+        ),
+        id=ride_id
+    )
     
     # Verify user is a passenger in this ride
-    if not RidePassenger.objects.filter(ride=ride, user=request.user).exists():
+    if not ride.is_passenger:
         messages.error(request, 'You are not a passenger in this ride')
         return redirect('ride_detail', ride_id=ride_id)
     
-    # Check if user is already sharing location
-    is_currently_sharing = LiveLocation.objects.filter(
-        user=request.user,
-        ride=ride,
-        is_sharing=True
-    ).exists()
-    
     context = {
         'ride': ride,
-        'is_currently_sharing': is_currently_sharing,
+        'is_currently_sharing': ride.is_currently_sharing,
     }
     return render(request, 'rides/share_location.html', context)
 
 
 # ==================== AADHAAR VERIFICATION VIEWS ====================
 
+# How long an OTP stays valid after it is sent, in seconds
+AADHAAR_OTP_VALIDITY = 600
+# Wrong OTP submissions after which verification is locked until an admin
+# resets the counter on the user's profile
+AADHAAR_MAX_FAILED_ATTEMPTS = 10
+AADHAAR_LOCKED_MESSAGE = 'Too many failed OTP attempts. Please contact support to unlock Aadhaar verification.'
+
+
+def _rate_limited(scope, limit, window, redirect_to):
+    """
+    Allow each user at most `limit` calls to the view per `window` seconds.
+    
+    Calls are counted in a cache key per user and time bucket; the counter
+    is created with add() and bumped with incr(), which are atomic on shared
+    cache backends, so concurrent requests can't slip past the limit.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key = f'ratelimit:{scope}:{request.user.id}:{int(time.time() // window)}'
+            cache.add(key, 0, window)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                # Bucket expired between add() and incr(); start a new one
+                cache.set(key, 1, window)
+                count = 1
+            if count > limit:
+                messages.error(request, 'Too many attempts. Please wait a few minutes and try again.')
+                return redirect(redirect_to)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 @login_required
 def aadhaar_verification_start(request):
     """
@@ -778,6 +950,7 @@ def aadhaar_verification_start(request):
 
 @login_required
 @require_http_methods(["POST"])
+@_rate_limited('aadhaar_send_otp', limit=3, window=600, redirect_to='aadhaar_verification_start')
 def aadhaar_send_otp(request):
     """
     Send OTP to Aadhaar-linked mobile number.
@@ -813,9 +986,12 @@ def aadhaar_send_otp(request):
         
         # Record consent
         profile = request.user.profile
+        if profile.aadhaar_failed_attempts >= AADHAAR_MAX_FAILED_ATTEMPTS:
+            messages.error(request, AADHAAR_LOCKED_MESSAGE)
+            return redirect('dashboard')
         profile.aadhaar_consent_given = True
         profile.aadhaar_consent_timestamp = timezone.now()
-        profile.save()
+        profile.save(update_fields=['aadhaar_consent_given', 'aadhaar_consent_timestamp'])
         
         # Get Aadhaar verification service
         aadhaar_service = get_aadhaar_service()
@@ -829,7 +1005,7 @@ def aadhaar_send_otp(request):
             # Also store last 4 digits temporarily for OTP verification
             request.session['aadhaar_transaction_id'] = transaction_id
             request.session['aadhaar_last_4'] = aadhaar_service.get_last_4_digits(aadhaar_number)
-            request.session['aadhaar_otp_sent_at'] = timezone.now().isoformat()
+            request.session['aadhaar_otp_expires_at'] = int(time.time()) + AADHAAR_OTP_VALIDITY
             
             # Clear the Aadhaar number from memory immediately
             aadhaar_number = None
@@ -845,9 +1021,7 @@ def aadhaar_send_otp(request):
             
     except Exception as e:
         # Log error without sensitive data
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Error in aadhaar_send_otp: {str(e)}")
+        logger.exception(f"Error in aadhaar_send_otp: {str(e)}")
         
         messages.error(request, 'System error. Please try again later.')
         return redirect('aadhaar_verification_start')
@@ -862,7 +1036,7 @@ def aadhaar_verify_otp(request):
     SECURITY:
     - Transaction ID stored in session (not exposed to user)
     - OTP validated on backend only
-    - Rate limiting recommended (prevent brute force)
+    - Submissions rate limited (max 5 per 10 minutes, prevents brute force)
     - Session timeout after 10 minutes
     """
     # Check if OTP was sent
@@ -871,19 +1045,19 @@ def aadhaar_verify_otp(request):
         messages.warning(request, 'Please start Aadhaar verification first.')
         return redirect('aadhaar_verification_start')
     
-    # Check session timeout (10 minutes)
-    otp_sent_at = request.session.get('aadhaar_otp_sent_at')
-    if otp_sent_at:
-        from datetime import timedelta
-        sent_time = datetime.fromisoformat(otp_sent_at)
-        if timezone.now() - sent_time > timedelta(minutes=10):
-            # Clear session
-            request.session.pop('aadhaar_transaction_id', None)
-            request.session.pop('aadhaar_last_4', None)
-            request.session.pop('aadhaar_otp_sent_at', None)
-            
-            messages.warning(request, 'OTP expired. Please request a new OTP.')
-            return redirect('aadhaar_verification_start')
+    # Check session timeout (10 minutes); the expiry is a POSIX timestamp.
+    # A missing expiry (e.g. a session from before it was stored) counts
+    # as expired, so no OTP flow outlives the limit.
+    otp_expires_at = request.session.get('aadhaar_otp_expires_at', 0)
+    if time.time() > otp_expires_at:
+        # Clear session
+        request.session.pop('aadhaar_transaction_id', None)
+        request.session.pop('aadhaar_last_4', None)
+        request.session.pop('aadhaar_otp_expires_at', None)
+        request.session.pop('aadhaar_otp_sent_at', None)
+        
+        messages.warning(request, 'OTP expired. Please request a new OTP.')
+        return redirect('aadhaar_verification_start')
     
     context = {
         'transaction_id': transaction_id,  # For display only (masked)
@@ -893,6 +1067,7 @@ def aadhaar_verify_otp(request):
 
 @login_required
 @require_http_methods(["POST"])
+@_rate_limited('aadhaar_submit_otp', limit=5, window=600, redirect_to='aadhaar_verify_otp')
 def aadhaar_submit_otp(request):
     """
     Submit and verify OTP.
@@ -925,6 +1100,14 @@ def aadhaar_submit_otp(request):
             messages.warning(request, 'Session expired. Please start again.')
             return redirect('aadhaar_verification_start')
         
+        # Refuse further guesses once the failure limit is reached
+        if request.user.profile.aadhaar_failed_attempts >= AADHAAR_MAX_FAILED_ATTEMPTS:
+            request.session.pop('aadhaar_transaction_id', None)
+            request.session.pop('aadhaar_last_4', None)
+            request.session.pop('aadhaar_otp_expires_at', None)
+            messages.error(request, AADHAAR_LOCKED_MESSAGE)
+            return redirect('dashboard')
+        
         # Get last 4 digits from session
         last_4_digits = request.session.get('aadhaar_last_4')
         
@@ -935,17 +1118,20 @@ def aadhaar_submit_otp(request):
         success, message, verified_data = aadhaar_service.verify_otp(transaction_id, otp)
         
         if success:
-            # Update UserProfile - Mark as verified
-            profile = request.user.profile
-            profile.aadhaar_verified = True
-            profile.aadhaar_verified_at = timezone.now()
-            profile.aadhaar_last_4_digits = last_4_digits
-            profile.save()
+            # Update UserProfile - Mark as verified. The UPDATE only matches
+            # while the profile is unverified, so concurrent submissions of
+            # the same OTP can't both record a verification
+            UserProfile.objects.filter(user=request.user, aadhaar_verified=False).update(
+                aadhaar_verified=True,
+                aadhaar_verified_at=timezone.now(),
+                aadhaar_last_4_digits=last_4_digits,
+                aadhaar_failed_attempts=0,
+            )
             
             # Clear session data (security best practice)
             request.session.pop('aadhaar_transaction_id', None)
             request.session.pop('aadhaar_last_4', None)
-            request.session.pop('aadhaar_otp_sent_at', None)
+            request.session.pop('aadhaar_otp_expires_at', None)
             
             # Show success message with verified name (optional)
             if verified_data and verified_data.get('full_name'):
@@ -962,15 +1148,16 @@ def aadhaar_submit_otp(request):
             
             return redirect('dashboard')
         else:
-            # Verification failed
+            # Verification failed; count it in SQL so parallel attempts all add up
+            UserProfile.objects.filter(user=request.user).update(
+                aadhaar_failed_attempts=F('aadhaar_failed_attempts') + 1
+            )
             messages.error(request, f'Verification failed: {message}')
             return redirect('aadhaar_verify_otp')
             
     except Exception as e:
         # Log error without sensitive data
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"Error in aadhaar_submit_otp: {str(e)}")
+        logger.exception(f"Error in aadhaar_submit_otp: {str(e)}")
         
         messages.error(request, 'System error. Please try again later.')
         return redirect('aadhaar_verify_otp')
@@ -982,13 +1169,13 @@ def aadhaar_resend_otp(request):
     Resend OTP if user didn't receive it.
     
     SECURITY:
-    - Rate limiting recommended (max 3 attempts per 10 minutes)
+    - Rate limited via aadhaar_send_otp (max 3 OTPs per 10 minutes)
     - Clears old transaction ID
     - Creates new transaction
     """
     # Clear old session data
     request.session.pop('aadhaar_transaction_id', None)
-    request.session.pop('aadhaar_otp_sent_at', None)
+    request.session.pop('aadhaar_otp_expires_at', None)
     
     messages.info(request, 'Please enter your Aadhaar number again to resend OTP.')
     return redirect('aadhaar_verification_start')
@@ -999,7 +1186,27 @@ def aadhaar_resend_otp(request):
 # ============================================================================
 
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
+
+
+# Site-wide counts on the admin dashboard; a few seconds of staleness is fine
+ADMIN_DASHBOARD_STATS_CACHE_KEY = 'admin:dashboard:stats'
+ADMIN_DASHBOARD_STATS_CACHE_TIMEOUT = 30
+
+
+def _admin_dashboard_stats():
+    # All ride counts come from a single aggregate query
+    ride_stats = Ride.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(ride_status__in=['created', 'started'])),
+        completed=Count('id', filter=Q(ride_status='completed')),
+    )
+    return {
+        'total_users': User.objects.count(),
+        'total_rides': ride_stats['total'],
+        'active_rides': ride_stats['active'],
+        'completed_rides': ride_stats['completed'],
+    }
 
 
 @staff_member_required
@@ -1008,23 +1215,19 @@ def admin_dashboard(request):
     Main admin dashboard showing key statistics.
     Accessible only to staff users (is_staff=True).
     """
-    # Get statistics
-    total_users = User.objects.count()
-    total_rides = Ride.objects.count()
-    active_rides = Ride.objects.filter(
-        ride_status__in=['created', 'started']
-    ).count()
-    completed_rides = Ride.objects.filter(ride_status='completed').count()
+    # Get statistics (cached briefly, so refreshing the page doesn't recount)
+    stats = cache.get_or_set(ADMIN_DASHBOARD_STATS_CACHE_KEY, _admin_dashboard_stats, ADMIN_DASHBOARD_STATS_CACHE_TIMEOUT)
     
-    # Get recent activities
-    recent_users = User.objects.order_by('-date_joined')[:5]
-    recent_rides = Ride.objects.select_related('creator').order_by('-created_at')[:5]
+    # Get recent activities (only the columns the dashboard tables show)
+    recent_users = User.objects.select_related('profile').only(
+        'email', 'date_joined', 'is_active', 'profile__user', 'profile__phone_number',
+    ).order_by('-date_joined')[:5]
+    recent_rides = Ride.objects.select_related('creator').only(
+        'from_location', 'to_location', 'ride_date', 'ride_status', 'creator__email',
+    ).order_by('-created_at')[:5]
     
     context = {
-        'total_users': total_users,
-        'total_rides': total_rides,
-        'active_rides': active_rides,
-        'completed_rides': completed_rides,
+        **stats,
         'recent_users': recent_users,
         'recent_rides': recent_rides,
     }
@@ -1044,12 +1247,16 @@ def admin_users_list(request):
     
     # Apply search
     if search_query:
-        users = users.filter(
+        search = (
             Q(email__icontains=search_query) |
             Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(profile__phone_number__icontains=search_query)
+            Q(last_name__icontains=search_query)
         )
+        # Stored phone numbers are digits only, so other queries can never
+        # match them; leave that LIKE out of the scan
+        if search_query.isdigit():
+            search |= Q(profile__phone_number__icontains=search_query)
+        users = users.filter(search)
     
     # Apply status filter
     if status_filter == 'active':
@@ -1059,12 +1266,20 @@ def admin_users_list(request):
     elif status_filter == 'staff':
         users = users.filter(is_staff=True)
     elif status_filter == 'verified':
-        users = users.filter(profile__aadhaar_verified=True)
+        # Semi-join: stops at the first matching profile row per user
+        users = users.filter(
+            Exists(UserProfile.objects.filter(user=OuterRef('pk'), aadhaar_verified=True))
+        )
     
     users = users.order_by('-date_joined')
     
+    # Only the current page of users is loaded; the template reads just the
+    # row's own fields and its profile, so there are no per-row queries
+    page_obj = Paginator(users, ADMIN_USERS_PER_PAGE).get_page(request.GET.get('page'))
+    
     context = {
-        'users': users,
+        'users': page_obj,
+        'page_obj': page_obj,
         'search_query': search_query,
         'status_filter': status_filter,
     }
@@ -1087,7 +1302,7 @@ def admin_toggle_user_status(request, user_id):
     
     # Toggle status
     user.is_active = not user.is_active
-    user.save()
+    user.save(update_fields=['is_active'])
     
     status = 'activated' if user.is_active else 'deactivated'
     messages.success(request, f'User {user.email} has been {status}.')
@@ -1095,16 +1310,8 @@ def admin_toggle_user_status(request, user_id):
     return redirect('admin_users_list')
 
 
-@staff_member_required
-def admin_rides_list(request):
-    """
-    List all rides with search and filter capabilities.
-    """
-    search_query = request.GET.get('search', '')
-    status_filter = request.GET.get('status', '')
-    
-    rides = Ride.objects.select_related('creator').prefetch_related('passengers').all()
-    
+def _filter_admin_rides(rides, search_query, status_filter):
+    """Apply the admin rides list search box and status filter, newest first."""
     # Apply search
     if search_query:
         rides = rides.filter(
@@ -1118,10 +1325,34 @@ def admin_rides_list(request):
     if status_filter:
         rides = rides.filter(ride_status=status_filter)
     
-    rides = rides.order_by('-created_at')
+    return rides.order_by('-created_at')
+
+
+@staff_member_required
+def admin_rides_list(request):
+    """
+    List all rides with search and filter capabilities.
+    """
+    search_query = request.GET.get('search', '')
+    status_filter = request.GET.get('status', '')
+    
+    # Only the columns the table shows; the driver's phone comes from the
+    # profile in the same JOIN instead of one query per row
+    rides = Ride.objects.select_related('creator__profile').only(
+        'from_location', 'to_location', 'distance_km', 'ride_date', 'ride_time',
+        'vehicle_number', 'vehicle_type', 'total_seats', 'seats_available', 'ride_status',
+        'driver_started', 'passenger_started', 'driver_ended', 'passenger_ended',
+        'creator__email', 'creator__profile__user', 'creator__profile__phone_number',
+    ).annotate(passenger_count=Count('passengers'))
+    
+    rides = _filter_admin_rides(rides, search_query, status_filter)
+    
+    # Only the current page of rides is fetched (LIMIT/OFFSET)
+    page_obj = Paginator(rides, ADMIN_RIDES_PER_PAGE).get_page(request.GET.get('page'))
     
     context = {
-        'rides': rides,
+        'rides': page_obj,
+        'page_obj': page_obj,
         'search_query': search_query,
         'status_filter': status_filter,
     }
@@ -1129,19 +1360,74 @@ def admin_rides_list(request):
     return render(request, 'rides/admin/rides_list.html', context)
 
 
+class _Echo:
+    """File-like object whose write() just returns the value, for csv.writer."""
+    def write(self, value):
+        return value
+
+
+# Leading characters that make spreadsheet apps read a cell as a formula
+_CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_safe_row(row):
+    """Quote user-typed text that a spreadsheet would evaluate as a formula."""
+    return [
+        f"'{value}" if isinstance(value, str) and value.startswith(_CSV_FORMULA_PREFIXES) else value
+        for value in row
+    ]
+
+
+@staff_member_required
+def admin_rides_export(request):
+    """
+    Export the rides matching the rides list filters as CSV.
+    The response is streamed, so large exports never sit in memory at once.
+    """
+    search_query = request.GET.get('search', '')
+    status_filter = request.GET.get('status', '')
+    
+    rides = _filter_admin_rides(
+        Ride.objects.annotate(passenger_count=Count('passengers')),
+        search_query,
+        status_filter,
+    ).values_list(
+        'id', 'from_location', 'to_location', 'ride_date', 'ride_time', 'distance_km',
+        'vehicle_type', 'vehicle_number', 'total_seats', 'seats_available', 'passenger_count',
+        'ride_status', 'creator__email', 'created_at',
+    )
+    
+    writer = csv.writer(_Echo())
+    header = [
+        'ID', 'From', 'To', 'Date', 'Time', 'Distance (km)', 'Vehicle Type', 'Vehicle Number',
+        'Total Seats', 'Seats Available', 'Passengers', 'Status', 'Driver Email', 'Created At',
+    ]
+    # iterator() fetches rows in chunks instead of caching the whole result
+    rows = chain([header], rides.iterator(chunk_size=2000))
+    
+    response = StreamingHttpResponse((writer.writerow(_csv_safe_row(row)) for row in rows), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="rides.csv"'
+    return response
+
+
 @staff_member_required
 def admin_ride_detail(request, ride_id):
     """
     View detailed information about a specific ride.
     """
+    # Driver and profile come in the ride's JOIN; passengers with their user
+    # and profile in one prefetch query, reused below instead of refetched
     ride = get_object_or_404(
-        Ride.objects.select_related('creator').prefetch_related(
-            'passengers__user__profile'
+        Ride.objects.select_related('creator__profile').prefetch_related(
+            Prefetch(
+                'passengers',
+                queryset=RidePassenger.objects.select_related('user__profile').order_by('joined_at'),
+            )
         ),
         id=ride_id
     )
     
-    passengers = RidePassenger.objects.filter(ride=ride).select_related('user__profile')
+    passengers = ride.passengers.all()
     
     context = {
         'ride': ride,
@@ -1160,15 +1446,25 @@ def admin_cancel_ride(request, ride_id):
     """
     ride = get_object_or_404(Ride, id=ride_id)
     
-    if ride.ride_status == 'completed':
-        messages.error(request, 'Cannot cancel a completed ride.')
+    # Mark the ride cancelled instead of deleting it, so it and its
+    # passengers stay on record. The UPDATE only matches rides that are
+    # still active, so a ride completed meanwhile is never cancelled.
+    cancelled = Ride.objects.filter(
+        pk=ride.pk, ride_status__in=['created', 'started']
+    ).update(ride_status='cancelled')
+    
+    if not cancelled:
+        messages.error(request, 'Only created or started rides can be cancelled.')
     else:
-        # Set ride status to a cancelled state
-        # Since the model doesn't have 'cancelled' status, we'll delete it
-        # Or you can add a 'cancelled' status to the model
-        ride_info = f"{ride.from_location} to {ride.to_location}"
-        ride.delete()
-        messages.success(request, f'Ride "{ride_info}" has been cancelled.')
+        # Nobody should keep sharing their location for a cancelled ride
+        locations = LiveLocation.objects.filter(ride=ride)
+        cache.delete_many([
+            _live_location_cache_key(user_id)
+            for user_id in locations.values_list('user_id', flat=True)
+        ])
+        locations.delete()
+        invalidate_dashboard_co2(ride)
+        messages.success(request, f'Ride "{ride.from_location} to {ride.to_location}" has been cancelled.')
     
     return redirect('admin_rides_list')
 
@@ -1180,7 +1476,9 @@ def admin_trips_ongoing(request):
     """
     ongoing_rides = Ride.objects.filter(
         ride_status__in=['created', 'started']
-    ).select_related('creator').prefetch_related('passengers').order_by('ride_date', 'ride_time')
+    ).select_related('creator__profile').annotate(
+        passenger_count=Count('passengers')
+    ).order_by('ride_date', 'ride_time')
     
     context = {
         'rides': ongoing_rides,
@@ -1196,7 +1494,9 @@ def admin_trips_completed(request):
     """
     completed_rides = Ride.objects.filter(
         ride_status='completed'
-    ).select_related('creator').prefetch_related('passengers').order_by('-created_at')
+    ).select_related('creator__profile').annotate(
+        passenger_count=Count('passengers')
+    ).order_by('-created_at')
     
     context = {
         'rides': completed_rides,
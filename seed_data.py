@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 
 from app import app, db, User, Ride, RidePassenger, ensure_database
 
@@ -18,7 +18,8 @@ def seed() -> None:
         carol = User(email="carol@eco.com")
         carol.set_password("password")
         db.session.add_all([alice, bob, carol])
-        db.session.commit()
+        # Flush (not commit) to get IDs; everything is committed once below
+        db.session.flush()
 
         tomorrow = datetime.utcnow().date() + timedelta(days=1)
         in_two_days = datetime.utcnow().date() + timedelta(days=2)
@@ -27,7 +28,7 @@ def seed() -> None:
             from_location="Campus",
             to_location="Downtown",
             ride_date=tomorrow,
-            ride_time=datetime.strptime("08:30", "%H:%M").time(),
+            ride_time=time(8, 30),
             vehicle_type="car_petrol",
             distance_km=12,
             total_seats=4,
@@ -39,7 +40,7 @@ def seed() -> None:
             from_location="Station",
             to_location="Office Park",
             ride_date=in_two_days,
-            ride_time=datetime.strptime("09:00", "%H:%M").time(),
+            ride_time=time(9, 0),
             vehicle_type="car_petrol",
             distance_km=20,
             total_seats=3,
@@ -48,14 +49,23 @@ def seed() -> None:
         )
 
         db.session.add_all([ride1, ride2])
-        db.session.commit()
+        db.session.flush()
+
+        # IDs are known, so the join rows skip per-object bookkeeping
+        db.session.bulk_save_objects([
+            RidePassenger(user_id=bob.id, ride_id=ride1.id),
+            RidePassenger(user_id=carol.id, ride_id=ride2.id),
+        ])
 
-        join1 = RidePassenger(user_id=bob.id, ride_id=ride1.id)
-        ride1.seats_available -= 1
-        join2 = RidePassenger(user_id=carol.id, ride_id=ride2.id)
-        ride2.seats_available -= 1
+        # Claim each seat in SQL, guarded so it never goes below zero
+        for ride in (ride1, ride2):
+            db.session.query(Ride).filter(
+                Ride.id == ride.id, Ride.seats_available > 0
+            ).update(
+                {"seats_available": Ride.seats_available - 1},
+                synchronize_session=False,
+            )
 
-        db.session.add_all([join1, join2])
         db.session.commit()
 
         print("Seed data created: 3 users, 2 rides.")
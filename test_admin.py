@@ -16,6 +16,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecocommute.settings')
 django.setup()
 
 from django.contrib.auth.models import User
+from django.db.models import Count, Q
 from django.urls import reverse, resolve
 from rides.models import Ride, UserProfile
 
@@ -63,10 +64,11 @@ def test_staff_users():
     print("Checking for Staff Users")
     print("=" * 60 + "\n")
     
-    staff_users = User.objects.filter(is_staff=True, is_active=True)
+    # Evaluated once; the count and the listing reuse the same rows
+    staff_users = list(User.objects.filter(is_staff=True, is_active=True).only('email'))
     
-    if staff_users.exists():
-        print(f"✅ Found {staff_users.count()} staff user(s):\n")
+    if staff_users:
+        print(f"✅ Found {len(staff_users)} staff user(s):\n")
         for user in staff_users:
             print(f"   - {user.email:30} (ID: {user.id})")
         print()
@@ -91,14 +93,26 @@ def test_database_stats():
     print("Database Statistics")
     print("=" * 60 + "\n")
     
-    total_users = User.objects.count()
-    active_users = User.objects.filter(is_active=True).count()
-    staff_users = User.objects.filter(is_staff=True).count()
+    # One aggregate query per table instead of one COUNT per figure
+    user_stats = User.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        staff=Count('id', filter=Q(is_staff=True)),
+    )
+    total_users = user_stats['total']
+    active_users = user_stats['active']
+    staff_users = user_stats['staff']
     
-    total_rides = Ride.objects.count()
-    created_rides = Ride.objects.filter(ride_status='created').count()
-    started_rides = Ride.objects.filter(ride_status='started').count()
-    completed_rides = Ride.objects.filter(ride_status='completed').count()
+    ride_stats = Ride.objects.aggregate(
+        total=Count('id'),
+        created=Count('id', filter=Q(ride_status='created')),
+        started=Count('id', filter=Q(ride_status='started')),
+        completed=Count('id', filter=Q(ride_status='completed')),
+    )
+    total_rides = ride_stats['total']
+    created_rides = ride_stats['created']
+    started_rides = ride_stats['started']
+    completed_rides = ride_stats['completed']
     
     print(f"Users:")
     print(f"   Total Users:        {total_users}")